@@ -1,19 +1,44 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import os
 import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple
+from functools import cache, lru_cache
+from importlib.util import find_spec
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
+# PyTorch's default CPU thread setup is often badly off for inference; OMP_NUM_THREADS has to be in the
+# environment before torch is imported (sentence_transformers imports it), an explicit user setting wins
+_NUM_THREADS = os.cpu_count() or 4
+os.environ.setdefault("OMP_NUM_THREADS", str(_NUM_THREADS))
+# let the Rust tokenizer use all cores on batched encodes (also silences its fork warning)
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
 import numpy as np
 import requests
-from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser
+
+# optional: with faiss installed repeated topic queries run on its SIMD inner-product kernels
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
 
-@dataclass
+# slots keep archives of thousands of events small; frozen makes them hashable (sets, dedup across scrapes)
+@dataclass(slots=True, frozen=True)
 class Event:
     """Represents all information tied to a single calendar event
     
@@ -39,12 +64,71 @@ class Event:
 
 seas_URL = "https://events.seas.harvard.edu"
 
+# detail pages are fetched concurrently (I/O bound, so threads are enough); capped so we don't hammer Drupal
+_DETAIL_WORKERS = 10
+
+# lxml is several times faster than the pure-python html.parser and releases the GIL while parsing,
+# so detail pages parsed inside the fetch workers actually overlap
+_PARSER = "lxml"
+
+# classes looked up on every detail page; find(class_=[...]) matches any of them in document order like the old
+# ".a, .b, .c" selectors did, but without soupsieve re-parsing a selector string on every call
+_DETAIL_DESC_CLASSES = ["field--name-body", "node__content", "content", "event-description", "pane-content"]
+_DETAIL_LOCATION_CLASSES = ["location", "event-location", "field--name-field-location"]
+
+# everything we read from a detail page lives in <body>, so don't build tree nodes for the <head>
+# (Drupal pages carry a lot of inline scripts/styles/meta up there)
+_DETAIL_STRAINER = SoupStrainer("body")
+
+# one session for the calendar + every detail page so the DNS/TCP/TLS handshake with the SEAS site happens once
+# pool is sized to the worker count so concurrent detail fetches each get a kept-alive connection
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(pool_connections=_DETAIL_WORKERS, pool_maxsize=_DETAIL_WORKERS, max_retries=3),
+)
+
+
+def _scrape_detail(link: str) -> Dict[str, str]:
+    """Fetch + parse one event detail page and return whichever of description / start_time / location it has.
+    Runs inside the scraper's thread pool, so parsing happens off the main thread too
+    Returns an empty dict if the page can't be fetched so the card values are kept
+    """
+    found: Dict[str, str] = {}
+    try:
+        # Fetch detail page with 10-second timeout (shorter than initial page to fail fast)
+        dresp = _SESSION.get(link, timeout=10)
+        dresp.raise_for_status()
+        # whole page is still downloaded; the strainer only keeps lxml from building tree nodes for <head>
+        dsoup = BeautifulSoup(dresp.content, _PARSER, parse_only=_DETAIL_STRAINER)
+
+        # Drupal CMS uses .field--name-body for main content field
+        # Try multiple selectors for robustness across theme variations
+        detail_desc = dsoup.find(class_=_DETAIL_DESC_CLASSES)
+        if detail_desc and detail_desc.get_text(strip=True):
+            # Replace card description with full detail page text
+            found["description"] = detail_desc.get_text(" ", strip=True)
+
+        # Attempt to improve date/time from detail page (may be more precise)
+        dt_el = dsoup.find("time")
+        if dt_el and dt_el.get_text(strip=True):
+            found["start_time"] = dt_el.get_text(strip=True)
+
+        # Update location with detail page version if available
+        loc_el = dsoup.find(class_=_DETAIL_LOCATION_CLASSES)
+        if loc_el and loc_el.get_text(strip=True):
+            found["location"] = loc_el.get_text(strip=True)
+    except Exception:
+        pass
+    return found
+
 
 def scrape_seas_events(limit: int = 30) -> List[Event]:
     """scraping pipeline:
     1 review the calendar HTML 
-    2. parse with BeautifulSoup to extract event cards
+    2. parse with selectolax to extract event cards
     3. extract info like title, date/time, location, etc...
+    4. fetch every detail page concurrently for the full description
     5. return  list of events
     """
     # start w/ empty list; append Event objects as we parse
@@ -52,86 +136,75 @@ def scrape_seas_events(limit: int = 30) -> List[Event]:
 
     try:
         # Fetch calendar page with 15-second timeout (Drupal sites can be slow)
-        resp = requests.get(urljoin(seas_URL, "/calendar"), timeout=15)
+        resp = _SESSION.get(urljoin(seas_URL, "/calendar"), timeout=15)
         resp.raise_for_status()  # Raise exception for HTTP errors (404, 500, etc.)
     except Exception as e:
         print(f"[SCRAPER] Request failed: {e}")
         return events  # Return empty list if fetch was unsuccessful
  # chat recommended adding error handling here to avoid crashing if the site is down or structure changes
  # also used chat for understnding Localist setup and how to extract location data, which is not in a consistent format across events (sometimes in text, sometimes in links)
-    soup = BeautifulSoup(resp.content, "html.parser")
+    # selectolax's lexbor backend does the CSS matching in C, several times faster than BeautifulSoup for the ~7
+    # lookups per card, and like select_one it returns selector-list matches in document order (Modest doesn't)
+    tree = LexborHTMLParser(resp.content)
     
    
-    cards = soup.select(".em-card, article, .views-row, .event")
+    cards = tree.css(".em-card, article, .views-row, .event")
+    # card-level fields first (one dict per event), detail pages are merged in afterwards
+    parsed: List[Dict[str, str]] = []
 
     for card in cards[:limit]:  
-        title_el = card.select_one("h3.em-card_title a, h3 a, h2 a")
+        title_el = card.css_first("h3.em-card_title a, h3 a, h2 a")
         if title_el:
-            title = title_el.get_text(strip=True)
-            link = title_el.get("href")  # Event link is typically in the title element
+            title = title_el.text(strip=True)
+            link = title_el.attributes.get("href")  # Event link is typically in the title element
             if link:
                 # Convert relative URLs (e.g., "/event/123") to absolute (https://...)
                 link = urljoin(seas_URL, link)
         else:
-            heading = card.select_one("h3, h2")
+            heading = card.css_first("h3, h2")
             if not heading:
                 continue
-            title = heading.get_text(strip=True)
+            title = heading.text(strip=True)
             link = None 
 
      
-        time_el = card.select_one("p.em-card_event-text time, p.em-card_event-text, time")
-        start_time = time_el.get_text(strip=True) if time_el else "TBD"
+        time_el = card.css_first("p.em-card_event-text time, p.em-card_event-text, time")
+        start_time = time_el.text(strip=True) if time_el else "TBD"
 
      
-        location_el = card.select_one("p.em-card_event-text a[href]") or card.select_one(".location")
+        location_el = card.css_first("p.em-card_event-text a[href]") or card.css_first(".location")
         location = (
-            location_el.get_text(strip=True) if location_el else "TBD"
+            location_el.text(strip=True) if location_el else "TBD"
         )
 
        
-        desc_el = card.select_one(".summary, .field--name-body, .description, p")
-        description = desc_el.get_text(" ", strip=True) if desc_el else title
+        # events with a link get their description from the detail page, so only look on the card when there's no link
+        # (and skip the old bare "p" fallback, which walked the whole card whenever the real selectors missed)
+        description = title
+        if not link:
+            desc_el = card.css_first(".summary, .field--name-body, .description")
+            if desc_el:
+                description = desc_el.text(separator=" ", strip=True)
+
+        parsed.append(
+            {
+                "title": title,
+                "description": description,
+                "start_time": start_time,
+                "location": location,
+                "link": link or "",
+            }
+        )
 
-       
-        if link:
-            try:
-                # Fetch detail page with 10-second timeout (shorter than initial page to fail fast)
-                dresp = requests.get(link, timeout=10)
-                dresp.raise_for_status()
-                dsoup = BeautifulSoup(dresp.content, "html.parser")
-
-                # Drupal CMS uses .field--name-body for main content field
-                # Try multiple selectors for robustness across theme variations
-                detail_desc = dsoup.select_one(
-                    ".field--name-body, .node__content, .content, .event-description, .pane-content"
-                )
-                if detail_desc and detail_desc.get_text(strip=True):
-                    # Replace card description with full detail page text
-                    description = detail_desc.get_text(" ", strip=True)
-
-                # Attempt to improve date/time from detail page (may be more precise)
-                dt_el = dsoup.select_one("time")
-                if dt_el and dt_el.get_text(strip=True):
-                    start_time = dt_el.get_text(strip=True)
-
-                # Update location with detail page version if available
-                loc_el = dsoup.select_one(".location, .event-location, .field--name-field-location")
-                if loc_el and loc_el.get_text(strip=True):
-                    location = loc_el.get_text(strip=True)
-            except Exception:
-                pass
+    # one request per distinct detail page (recurring events can share a URL), run side by side instead of back to back
+    links = list(dict.fromkeys(fields["link"] for fields in parsed if fields["link"]))
+    with ThreadPoolExecutor(max_workers=_DETAIL_WORKERS) as pool:
+        details = dict(zip(links, pool.map(_scrape_detail, links)))
+
+    for fields in parsed:
+        fields.update(details.get(fields["link"], {}))
 # if the shoe fits the keyword, add to list of recommended events :)
-        events.append(
-            Event(
-                title=title,
-                description=description,
-                start_time=start_time,
-                location=location,
-                organization="Harvard SEAS",
-                link=link or "",
-            )
-        )
+        events.append(Event(organization="Harvard SEAS", **fields))
 
     print(f"[SCRAPER] Extracted {len(events)} events.")
     for e in events[:5]:
@@ -148,16 +221,212 @@ def scrape_seas_events(limit: int = 30) -> List[Event]:
 # 4. Sort by score descending (highest relevance first)
 #
 
-_model = SentenceTransformer("all-MiniLM-L6-v2")
+_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# the transformer forward pass is the slowest step of the whole pipeline, so run it on ONNX Runtime with the
+# dynamically int8-quantized export that ships in the model repo (roughly 2-4x faster than PyTorch on CPU)
+# AVX2 build is the one that works on basically any x86 machine; falls back to PyTorch if ORT/optimum is missing
+_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+_ONNX_VARIANT = "onnx-quint8"
+_TORCH_VARIANT = "torch"
+
+
+def _onnx_installed() -> bool:
+    return find_spec("onnxruntime") is not None and find_spec("optimum") is not None
+
+
+@cache
+def _get_model() -> Tuple[SentenceTransformer, str]:
+    """Load the encoder on first use (not at import), preferring the quantized ONNX export.
+    Returns the model plus a short name for the variant actually loaded (embeddings differ slightly between them)
+    """
+    # torch + sentence_transformers take a couple of seconds just to import, so they're only pulled in here
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # all threads go to intra-op parallelism inside the single encode call
+    torch.set_num_threads(_NUM_THREADS)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # can only be set once per process, before any parallel work
+
+    # only try ONNX when optimum[onnxruntime] is installed; warn if it is but still can't load
+    model: Optional[SentenceTransformer] = None
+    variant = _TORCH_VARIANT
+    if _onnx_installed():
+        try:
+            import onnxruntime as ort
+
+            sess_options = ort.SessionOptions()
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            sess_options.intra_op_num_threads = _NUM_THREADS
+            model = SentenceTransformer(
+                _MODEL_NAME,
+                backend="onnx",
+                model_kwargs={
+                    "file_name": _ONNX_FILE,
+                    "provider": "CPUExecutionProvider",
+                    "session_options": sess_options,
+                },
+            )
+            variant = _ONNX_VARIANT
+        except Exception as e:
+            print(f"[MODEL] ONNX backend failed to load ({e}), using PyTorch")
+    if model is None:
+        model = SentenceTransformer(_MODEL_NAME)
+
+    # tokenizing a batch is a noticeable slice of encode time; the Rust "fast" tokenizer is several times quicker
+    # than the pure-python one, so swap it in if an older install handed us the slow one
+    if not getattr(model.tokenizer, "is_fast", False):
+        from transformers import AutoTokenizer
+
+        model.tokenizer = AutoTokenizer.from_pretrained(f"sentence-transformers/{_MODEL_NAME}", use_fast=True)
+
+    _save_variant(variant)
+    return model, variant
+
+
+# embeddings are also saved to disk (one .npy per text, keyed by sha256) so rerunning the CLI with the
+# same topic / same scraped events skips the transformer forward pass entirely
+_DISK_CACHE = Path("~/.cache/seas_embed").expanduser() / _MODEL_NAME
+
+
+# records which variant the last model load actually produced (ONNX can be installed and still fail to load)
+_VARIANT_MARKER = _DISK_CACHE / "variant"
+
+
+@cache
+def _saved_variant() -> Optional[str]:
+    try:
+        variant = _VARIANT_MARKER.read_text().strip()
+    except OSError:
+        return None
+    return variant if variant in (_ONNX_VARIANT, _TORCH_VARIANT) else None
+
+
+def _save_variant(variant: str) -> None:
+    if _saved_variant() == variant:
+        return
+    try:
+        _DISK_CACHE.mkdir(parents=True, exist_ok=True)
+        _VARIANT_MARKER.write_text(variant)
+    except OSError:
+        pass
+
+
+def _model_variant() -> str:
+    # once the model is loaded use the variant it actually ended up as; before that, reuse what the last run
+    # loaded (or predict it from what's installed) so a fully cached run never imports torch or loads weights
+    if _get_model.cache_info().currsize:
+        return _get_model()[1]
+    saved = _saved_variant()
+    if saved is not None:
+        return saved
+    return _ONNX_VARIANT if _onnx_installed() else _TORCH_VARIANT
+
+
+def _cache_path(text: str, variant: str) -> Path:
+    # one subfolder per model variant so ONNX and PyTorch vectors never mix
+    return _DISK_CACHE / variant / (hashlib.sha256(text.encode("utf-8")).hexdigest() + ".npy")
+
+
+def _load_cached(text: str, variant: str) -> Optional[np.ndarray]:
+    path = _cache_path(text, variant)
+    try:
+        return np.load(path)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # empty/partial file (e.g. left over from an older run); drop it so it gets re-encoded and rewritten
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+
+
+def _save_cached(text: str, variant: str, vec: np.ndarray) -> None:
+    # cache is best-effort, a read-only home dir shouldn't break ranking
+    path = _cache_path(text, variant)
+    tmp: Optional[Path] = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temp file next to the real one and rename it into place, so a Ctrl-C, full disk or a
+        # concurrent run never sees a half-written .npy
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+            tmp = Path(f.name)
+            np.save(f, vec)
+        os.replace(tmp, path)
+    except OSError:
+        if tmp is not None:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
 
 
 def embed(text: str) -> np.ndarray:
-    
-    return _model.encode(text, convert_to_numpy=True)
+    """Unit-length embedding for a single string (memoized in-process and on disk).
+    """
+    return _embed(text, _model_variant())
+
+
+@lru_cache(maxsize=4096)
+def _embed(text: str, variant: str) -> np.ndarray:
+    vec = _load_cached(text, variant)
+    if vec is None:
+        model, loaded = _get_model()
+        vec = model.encode(
+            text, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False
+        )
+        _save_cached(text, loaded, vec)
+    # shared between callers through the lru_cache, so don't let anyone mutate it
+    vec.setflags(write=False)
+    return vec
+
+
+def embed_many(texts: List[str]) -> np.ndarray:
+    """Unit-length embeddings for a list of strings, shape (len(texts), dim).
+    Each distinct text is embedded once: cached ones are loaded, the rest go through one batched encode call
+    """
+    # recurring seminars produce identical event texts, so work on the distinct ones and scatter back at the end
+    uniq = list(dict.fromkeys(texts))
+    variant = _model_variant()
+    found: Dict[str, np.ndarray] = {}
+    missing: List[str] = []
+    for text in uniq:
+        vec = _load_cached(text, variant)
+        if vec is None:
+            missing.append(text)
+        else:
+            found[text] = vec
+
+    if missing:
+        model, loaded = _get_model()
+        if loaded != variant:
+            # the model came up as a different variant than the cache we read from; re-encode everything
+            # rather than mix vectors from two models in one result
+            found.clear()
+            missing = uniq
+        # SentenceTransformers sorts by length and pads per mini-batch, so this is much cheaper than one call per text
+        encoded = model.encode(
+            missing,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        for text, vec in zip(missing, encoded):
+            found[text] = vec
+            _save_cached(text, loaded, vec)
+
+    return np.stack([found[text] for text in texts])
 
 
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     """Compute cosine similarity between two embedding vectors.
+    (rank_events_by_topic scores everything with one matmul over normalized embeddings; this is for one-off pairs)
     Cosine similarity measures the angle between vectors in embedding space:
     - 1.0: identical direction (perfect match)
     - 0.5: moderate alignment
@@ -174,33 +443,96 @@ def event_text(event: Event) -> str:
 
 
 
+# past this many events the exact flat index is swapped for an approximate HNSW graph
+_HNSW_MIN_EVENTS = 10_000
+
+
+class EventIndex:
+    """Embeddings for a fixed set of events, built once and then queried for any number of topics.
+    Backed by a FAISS inner-product index when faiss is installed (and use_faiss is set), otherwise a float32 numpy matmul
+    """
+
+    def __init__(self, events: List[Event], use_faiss: bool = True):
+        self.events = list(events)
+        self._use_faiss = use_faiss
+        self._faiss_index = None
+        self._event_embeddings: Optional[np.ndarray] = None
+        self._variant: Optional[str] = None
+        if self.events:
+            self._build()
+
+    def _build(self) -> None:
+        # event embeddings come back unit length (and cached across runs), so inner product == cosine similarity
+        event_embeddings = embed_many([event_text(event) for event in self.events])
+        self._variant = _model_variant()
+        self._faiss_index = None
+        self._event_embeddings = None
+        if self._use_faiss and faiss is not None:
+            dim = event_embeddings.shape[1]
+            if len(self.events) >= _HNSW_MIN_EVENTS:
+                index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexFlatIP(dim)
+            index.add(np.ascontiguousarray(event_embeddings, dtype=np.float32))
+            self._faiss_index = index
+        else:
+            self._event_embeddings = event_embeddings
+
+    def search(
+        self,
+        topic: str,
+        threshold: float = 0.25,
+        top_k: Optional[int] = 20,
+    ) -> List[Tuple[Event, float]]:
+        """Events scoring >= threshold against the topic, most relevant first, at most top_k (None = all of them).
+        """
+        k = len(self.events) if top_k is None else min(top_k, len(self.events))
+        if k <= 0:
+            return []
+        topic_embedding = embed(topic)
+        if _model_variant() != self._variant:
+            # events all came from the disk cache but encoding the topic loaded a different model variant,
+            # so re-embed the events with it instead of comparing vectors from two models
+            self._build()
+            topic_embedding = embed(topic)
+
+        if self._faiss_index is not None:
+            # faiss hands back the k best already sorted by score descending; -1 marks empty slots
+            scores, ids = self._faiss_index.search(topic_embedding[None, :].astype(np.float32), k)
+            return [
+                (self.events[i], float(score))
+                for score, i in zip(scores[0], ids[0])
+                if i >= 0 and score >= threshold
+            ]
+
+        # embeddings are unit length, so one matmul gives the cosine similarity for every event
+        scores = self._event_embeddings @ topic_embedding
+
+        # Keep only events above threshold
+        keep = np.flatnonzero(scores >= threshold)
+        if k < keep.size:
+            # only the best k need ordering, so partition first: O(N + k log k) instead of sorting everything
+            keep = keep[np.argpartition(-scores[keep], k - 1)[:k]]
+
+        # Sort by score descending: highest-relevance events first
+        order = keep[np.argsort(-scores[keep], kind="stable")]
+        return [(self.events[i], float(scores[i])) for i in order]
+
+
 def rank_events_by_topic(
     events: List[Event],
     topic: str,
     threshold: float = 0.25,
+    top_k: Optional[int] = 20,
 ) -> List[Tuple[Event, float]]:
     """Score and filter events by relevance to a topic.
      Keep only events with score >= threshold (filter noise)
-    Sort by most relevant first
-    
+    Sort by most relevant first, returning at most top_k events (None = all of them)
+    To query several topics against the same events, build one EventIndex and call search() on it instead
    
     """
-
-    topic_embedding = embed(topic)
-    matches: List[Tuple[Event, float]] = []
-
-    # Score each event against the topic
-    for event in events:
-        # Combine event fields, embed, and compute similarity to topic
-        score = cosine_similarity(topic_embedding, embed(event_text(event)))
-        
-        # Keep only events above threshold
-        if score >= threshold:
-            matches.append((event, score))
-
-    # Sort by score descending: highest-relevance events first
-    matches.sort(key=lambda x: x[1], reverse=True)
-    return matches
+    # a single query is cheaper as one matmul than building a FAISS index just to throw it away
+    return EventIndex(events, use_faiss=False).search(topic, threshold, top_k)
 
 
 # print
@@ -245,6 +577,12 @@ def main():
         default=0.25,
         help="Minimum relevance score [0-1] to include an event (default: 0.25)"
     )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=20,
+        help="Maximum number of events to show, most relevant first (default: 20)"
+    )
 
     args = parser.parse_args()
 
@@ -254,7 +592,7 @@ def main():
 
     # rank events by relevance
     print(f"Scoring events for topic: {args.topic}")
-    matches = rank_events_by_topic(events, args.topic, args.threshold)
+    matches = rank_events_by_topic(events, args.topic, args.threshold, args.top_k)
 
     # 3: Format results
     body = calendar_report(args.topic, matches)